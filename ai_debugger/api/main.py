@@ -1,8 +1,13 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.responses import PlainTextResponse, HTMLResponse
 from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple, Union
 from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import contextvars
+import functools
+import json
 import time
 import os
 from dotenv import load_dotenv
@@ -18,10 +23,12 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
 from ai_debugger.correlator.incident_window import detect_incident_window
 from ai_debugger.correlator.signal_ranker import rank_signals
-from ai_debugger.reasoning.prompt_template import build_prompt
+from ai_debugger.reasoning.prompt_template import build_prompt, build_batch_prompt
 from ai_debugger.reasoning.llm_client import get_llm_client, LLMResponseError
 from ai_debugger.reasoning.response_validator import validate_rca_response, InvalidRCAResponse
 from ai_debugger.collector.events import KubernetesEventCollector
+from ai_debugger.profiling import stage, current_timings
+from ai_debugger.api.profiling import router as debug_router, profiling_middleware
 
 # -------------------------
 # Prometheus Metrics
@@ -48,12 +55,50 @@ SIGNALS_PROCESSED = Counter(
     "Total number of signals processed"
 )
 
+BATCH_LATENCY = Histogram(
+    "ai_debugger_analyze_batch_latency_seconds",
+    "Latency of batch analyze endpoint",
+    buckets=(0.1, 0.3, 0.5, 1, 2, 3, 5, 10, 30)
+)
+
+BATCH_ITEMS_TOTAL = Counter(
+    "ai_debugger_batch_items_total",
+    "Total number of batch analyze items",
+    ["status"]
+)
+
+BATCH_ITEMS_DEDUPLICATED = Counter(
+    "ai_debugger_batch_items_deduplicated_total",
+    "Total number of batch items that reused the result of an identical evidence set"
+)
+
+BATCH_LLM_CALLS = Counter(
+    "ai_debugger_batch_llm_calls_total",
+    "Total number of LLM calls made by batch analyze",
+    ["kind"]
+)
+
+# -------------------------
+# Batch Settings
+# -------------------------
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "100"))
+BATCH_MAX_WORKERS = int(os.getenv("BATCH_MAX_WORKERS", "8"))
+# Tasks with at most this many signals are packed together into one LLM call
+LLM_BATCH_MAX_SIGNALS = int(os.getenv("LLM_BATCH_MAX_SIGNALS", "20"))
+LLM_BATCH_MAX_TASKS = int(os.getenv("LLM_BATCH_MAX_TASKS", "5"))
+
+BATCH_EXECUTOR = ThreadPoolExecutor(max_workers=BATCH_MAX_WORKERS, thread_name_prefix="batch-analyze")
+
 app = FastAPI(
     title="AI Production Debugging Assistant",
     description="Automated Root Cause Analysis for Kubernetes",
     version="1.0.0"
 )
 
+# Stage timings (X-Debug-Timing), request sampling and admin-gated /debug endpoints
+app.middleware("http")(profiling_middleware)
+app.include_router(debug_router)
+
 # -------------------------
 # Request Models
 # -------------------------
@@ -62,6 +107,15 @@ class AnalyzeRequest(BaseModel):
     llm_mode: str = "disabled"
     namespace: Optional[str] = None
 
+class BatchItem(BaseModel):
+    signals: List[Dict[str, Any]]
+    id: Optional[str] = None
+    namespace: Optional[str] = None
+
+class BatchAnalyzeRequest(BaseModel):
+    items: List[BatchItem]
+    llm_mode: str = "disabled"
+
 class AutoAnalyzeRequest(BaseModel):
     namespace: str
     window_minutes: int = 10
@@ -123,6 +177,7 @@ async def root():
             <div class="endpoint">GET  /health - Health check</div>
             <div class="endpoint">GET  /metrics - Prometheus metrics</div>
             <div class="endpoint">POST /analyze - Manual analysis</div>
+            <div class="endpoint">POST /analyze/batch - Analyze many signal sets at once</div>
             <div class="endpoint">POST /auto-analyze - Auto-collect & analyze</div>
         </div>
 
@@ -157,16 +212,14 @@ async def root():
     """
 
 # -------------------------
-# Analyze Endpoint
+# Analysis Pipeline
 # -------------------------
-@app.post("/analyze")
-async def analyze(req: AnalyzeRequest):
-    start_time = time.time()
-    
-    try:
-        # Validate signals
-        signals = []
-        for s in req.signals:
+def _correlate(raw_signals: List[Dict[str, Any]]) -> Tuple[int, Dict, List[Dict]]:
+    """Validates, correlates and ranks signals. Returns (signal count, incident, ranked evidence)"""
+    # Validate signals
+    signals = []
+    with stage("validate_signals"):
+        for s in raw_signals:
             if "name" not in s or "value" not in s:
                 raise ValueError("Each signal must have name and value")
             
@@ -178,41 +231,122 @@ async def analyze(req: AnalyzeRequest):
                 "timestamp": s.get("timestamp") or datetime.now(timezone.utc).isoformat(),
                 "source": s.get("source", "manual")
             })
-        
-        SIGNALS_PROCESSED.inc(len(signals))
-        
-        # Detect incident window
+    
+    SIGNALS_PROCESSED.inc(len(signals))
+    
+    # Detect incident window
+    with stage("detect_incident_window"):
         incident_result = detect_incident_window(signals)
-        
-        # Rank signals
+    
+    # Rank signals
+    with stage("rank_signals"):
         ranked = rank_signals(signals)
-        
-        # Add evidence IDs
-        for idx, signal in enumerate(ranked, start=1):
-            signal["id"] = f"E{idx}"
+    
+    # Add evidence IDs
+    for idx, signal in enumerate(ranked, start=1):
+        signal["id"] = f"E{idx}"
+    
+    return len(signals), incident_result, ranked
+
+def _reason(llm, ranked: List[Dict]) -> Dict[str, Any]:
+    """Runs a single RCA task through the LLM and validates the response"""
+    with stage("build_prompt"):
+        prompt = build_prompt(ranked)
+    with stage("llm_analyze"):
+        llm_response = llm.analyze(prompt)
+    with stage("validate_rca_response"):
+        return validate_rca_response(llm_response, ranked)
+
+def _reason_packed(llm, tasks: List[List[Dict]]) -> List[Optional[Union[Dict[str, Any], Exception]]]:
+    """
+    Runs several small RCA tasks through one LLM call.
+    Each task is validated on its own and tasks missing from the response are None.
+    A failure of the packed call itself is raised.
+    """
+    task_ids = [f"T{idx}" for idx in range(1, len(tasks) + 1)]
+    
+    with stage("build_prompt"):
+        prompt = build_batch_prompt(dict(zip(task_ids, tasks)))
+    BATCH_LLM_CALLS.labels(kind="packed").inc()
+    with stage("llm_analyze"):
+        responses = llm.analyze_batch(prompt, task_ids)
+    
+    results = []
+    for task_id, ranked in zip(task_ids, tasks):
+        response = responses.get(task_id)
+        if not isinstance(response, dict):
+            results.append(None)
+            continue
+        with stage("validate_rca_response"):
+            results.append(_capture(validate_rca_response, response, ranked))
+    return results
+
+def _capture(fn, *args):
+    # Batch items report their own errors instead of failing the whole batch
+    try:
+        return fn(*args)
+    except Exception as e:
+        return e
+
+def _build_result(signals_analyzed: int, incident_result: Dict, ranked: List[Dict], rca: Optional[Dict]) -> Dict[str, Any]:
+    if rca is not None:
+        return {
+            "status": "success",
+            "mode": "llm",
+            "incident": incident_result,
+            "signals_analyzed": signals_analyzed,
+            "rca": rca
+        }
+    return {
+        "status": "success",
+        "mode": "rule-based",
+        "incident": incident_result,
+        "signals_analyzed": signals_analyzed,
+        "top_signals": ranked[:3]
+    }
+
+async def _run_in_pool(fn, *args):
+    # Each call gets its own context copy so stage timings follow the request into the worker
+    ctx = contextvars.copy_context()
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(BATCH_EXECUTOR, functools.partial(ctx.run, fn, *args))
+
+async def _reason_pack(llm, tasks: List[List[Dict]]) -> List[Union[Dict[str, Any], Exception]]:
+    """Runs a pack of RCA tasks, retrying tasks the packed call failed or dropped as single calls"""
+    try:
+        results = await _run_in_pool(_reason_packed, llm, tasks)
+    except Exception:
+        results = [None] * len(tasks)
+    
+    # Retry on the pool so a failed pack does not hold a single worker
+    retry = [idx for idx, rca in enumerate(results) if rca is None]
+    BATCH_LLM_CALLS.labels(kind="single").inc(len(retry))
+    retried = await asyncio.gather(*(_run_in_pool(_capture, _reason, llm, tasks[idx]) for idx in retry))
+    for idx, rca in zip(retry, retried):
+        results[idx] = rca
+    return results
+
+# -------------------------
+# Analyze Endpoint
+# -------------------------
+@app.post("/analyze")
+async def analyze(req: AnalyzeRequest):
+    start_time = time.time()
+    
+    try:
+        signals_analyzed, incident_result, ranked = _correlate(req.signals)
         
         # LLM reasoning (if enabled)
+        rca = None
         if req.llm_mode != "disabled":
-            prompt = build_prompt(ranked)
             llm = get_llm_client(mode=req.llm_mode)
-            llm_response = llm.analyze(prompt)
-            validated = validate_rca_response(llm_response, ranked)
-            
-            result = {
-                "status": "success",
-                "mode": "llm",
-                "incident": incident_result,
-                "signals_analyzed": len(signals),
-                "rca": validated
-            }
-        else:
-            result = {
-                "status": "success",
-                "mode": "rule-based",
-                "incident": incident_result,
-                "signals_analyzed": len(signals),
-                "top_signals": ranked[:3]
-            }
+            rca = _reason(llm, ranked)
+        
+        result = _build_result(signals_analyzed, incident_result, ranked, rca)
+        
+        timings = current_timings()
+        if timings is not None:
+            result["timings"] = timings
         
         ANALYZE_REQUESTS_TOTAL.labels(status="success").inc()
         return result
@@ -223,6 +357,103 @@ async def analyze(req: AnalyzeRequest):
     finally:
         ANALYZE_LATENCY.observe(time.time() - start_time)
 
+# -------------------------
+# Batch Analyze Endpoint
+# -------------------------
+@app.post("/analyze/batch")
+async def analyze_batch(req: BatchAnalyzeRequest):
+    """
+    Analyzes many independent signal sets in one request.
+    Identical evidence sets are analyzed once, LLM calls run on BATCH_MAX_WORKERS
+    threads, and small RCA tasks are packed into shared LLM calls when the provider
+    supports it; tasks a packed call fails or drops are retried as single calls. Failed items are reported without failing the batch.
+    
+    With X-Debug-Timing, stage timings are summed over all items and workers, so
+    they can exceed the wall time of the request.
+    """
+    if len(req.items) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"Batch exceeds {BATCH_MAX_ITEMS} items")
+    
+    start_time = time.time()
+    
+    try:
+        # Deduplicate identical evidence sets
+        groups: Dict[str, List[int]] = {}
+        for idx, item in enumerate(req.items):
+            key = json.dumps(item.signals, sort_keys=True, default=str)
+            groups.setdefault(key, []).append(idx)
+        unique_items = list(groups.values())
+        BATCH_ITEMS_DEDUPLICATED.inc(len(req.items) - len(unique_items))
+        
+        # Correlate unique evidence sets inline, this is CPU-bound and gains nothing from threads
+        correlated = [_capture(_correlate, req.items[indexes[0]].signals) for indexes in unique_items]
+        
+        # LLM reasoning (if enabled)
+        rcas: List[Optional[Union[Dict[str, Any], Exception]]] = [None] * len(unique_items)
+        if req.llm_mode != "disabled":
+            llm = get_llm_client(mode=req.llm_mode)
+            pending = [idx for idx, c in enumerate(correlated) if not isinstance(c, Exception)]
+            
+            packable = []
+            if llm.supports_batching:
+                packable = [idx for idx in pending if len(correlated[idx][2]) <= LLM_BATCH_MAX_SIGNALS]
+            packed = set(packable)
+            singles = [idx for idx in pending if idx not in packed]
+            packs = [packable[i:i + LLM_BATCH_MAX_TASKS] for i in range(0, len(packable), LLM_BATCH_MAX_TASKS)]
+            
+            BATCH_LLM_CALLS.labels(kind="single").inc(len(singles))
+            pack_results, single_results = await asyncio.gather(
+                asyncio.gather(*(
+                    _reason_pack(llm, [correlated[idx][2] for idx in pack]) for pack in packs
+                )),
+                asyncio.gather(*(
+                    _run_in_pool(_capture, _reason, llm, correlated[idx][2]) for idx in singles
+                ))
+            )
+            
+            for pack, results in zip(packs, pack_results):
+                for idx, rca in zip(pack, results):
+                    rcas[idx] = rca
+            for idx, rca in zip(singles, single_results):
+                rcas[idx] = rca
+        
+        # Fan results back out to every item
+        results: List[Optional[Dict[str, Any]]] = [None] * len(req.items)
+        for unique_idx, indexes in enumerate(unique_items):
+            outcome = correlated[unique_idx]
+            rca = rcas[unique_idx]
+            if isinstance(outcome, Exception):
+                error = outcome
+            elif isinstance(rca, Exception):
+                error = rca
+            else:
+                error = None
+            
+            for idx in indexes:
+                item_id = req.items[idx].id or str(idx)
+                if error is not None:
+                    BATCH_ITEMS_TOTAL.labels(status="error").inc()
+                    results[idx] = {"id": item_id, "status": "error", "error": str(error)}
+                else:
+                    BATCH_ITEMS_TOTAL.labels(status="success").inc()
+                    results[idx] = {"id": item_id, **_build_result(*outcome, rca)}
+        
+        response = {
+            "status": "success",
+            "items_total": len(req.items),
+            "items_failed": sum(1 for r in results if r["status"] == "error"),
+            "unique_evidence_sets": len(unique_items),
+            "results": results
+        }
+        
+        timings = current_timings()
+        if timings is not None:
+            response["timings"] = timings
+        
+        return response
+    finally:
+        BATCH_LATENCY.observe(time.time() - start_time)
+
 # -------------------------
 # Auto-Analyze Endpoint
 # -------------------------
@@ -241,36 +472,41 @@ async def auto_analyze(req: AutoAnalyzeRequest):
         # Convert to signals
         signals = []
         
-        # Add pod events
-        for event in events["pod_events"]:
-            signals.append({
-                "name": event["reason"],
-                "value": event["pod"],
-                "signal_type": "pod_event",
-                "severity": 9,
-                "timestamp": event["last_seen"],
-                "source": "kubernetes",
-                "message": event.get("message", "")
-            })
-        
-        # Add restarts
-        for restart in restarts:
-            signals.append({
-                "name": "restart_count",
-                "value": restart["restart_count"],
-                "pod": restart["pod"],
-                "signal_type": "restart",
-                "severity": min(restart["restart_count"] * 2, 10),
-                "timestamp": datetime.now(timezone.utc).isoformat(),
-                "source": "kubernetes"
-            })
+        with stage("build_signals"):
+            # Add pod events
+            for event in events["pod_events"]:
+                signals.append({
+                    "name": event["reason"],
+                    "value": event["pod"],
+                    "signal_type": "pod_event",
+                    "severity": 9,
+                    "timestamp": event["last_seen"],
+                    "source": "kubernetes",
+                    "message": event.get("message", "")
+                })
+            
+            # Add restarts
+            for restart in restarts:
+                signals.append({
+                    "name": "restart_count",
+                    "value": restart["restart_count"],
+                    "pod": restart["pod"],
+                    "signal_type": "restart",
+                    "severity": min(restart["restart_count"] * 2, 10),
+                    "timestamp": datetime.now(timezone.utc).isoformat(),
+                    "source": "kubernetes"
+                })
         
         if not signals:
-            return {
+            result = {
                 "status": "success",
                 "message": f"No issues detected in namespace {req.namespace} in the last {req.window_minutes} minutes",
                 "signals_found": 0
             }
+            timings = current_timings()
+            if timings is not None:
+                result["timings"] = timings
+            return result
         
         # Analyze the signals
         analyze_req = AnalyzeRequest(
@@ -0,0 +1,150 @@
+import hmac
+import os
+import pstats
+import tracemalloc
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse, Response
+
+from ai_debugger.profiling import (
+    TRACEMALLOC_TOP_N,
+    allocation_report,
+    request_timings,
+    start_tracemalloc,
+    stop_tracemalloc,
+)
+from ai_debugger.api.sampling import request_sampler, stack_sampler
+
+DEBUG_TIMING_HEADER = "X-Debug-Timing"
+DEBUG_TIMING_VALUES = {"1", "true", "yes", "on"}
+ADMIN_TOKEN_HEADER = "X-Admin-Token"
+
+# -------------------------
+# Middleware
+# -------------------------
+async def profiling_middleware(request: Request, call_next):
+    enabled = request.headers.get(DEBUG_TIMING_HEADER, "").strip().lower() in DEBUG_TIMING_VALUES
+    with request_timings(enabled) as timings:
+        if not request.url.path.startswith("/debug") and request_sampler.should_sample():
+            with request_sampler.profile():
+                response = await call_next(request)
+        else:
+            response = await call_next(request)
+
+    if timings:
+        response.headers["Server-Timing"] = ", ".join(
+            f"{name};dur={duration}" for name, duration in timings.items()
+        )
+    return response
+
+# -------------------------
+# Admin Endpoints
+# -------------------------
+def require_admin(x_admin_token: Optional[str] = Header(default=None)):
+    admin_token = os.getenv("ADMIN_TOKEN")
+    if not admin_token:
+        # Profiling surface is disabled unless an admin token is configured
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, admin_token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+router = APIRouter(prefix="/debug", dependencies=[Depends(require_admin)])
+
+
+@router.post("/profile/wall")
+def profile_wall(
+    duration: float = Query(10.0, gt=0, le=120),
+    interval_ms: float = Query(10.0, ge=1, le=1000),
+    include_idle: bool = Query(False),
+):
+    """
+    Samples the wall-clock stacks of all threads for `duration` seconds and returns
+    collapsed stacks. Threads waiting for work or I/O are skipped unless `include_idle`.
+    """
+    profile = stack_sampler.run(duration, interval_ms / 1000, include_idle)
+    if profile is None:
+        raise HTTPException(status_code=409, detail="A wall-clock profile is already running")
+    return PlainTextResponse(
+        profile.collapsed(),
+        headers={"Content-Disposition": "attachment; filename=profile.collapsed"}
+    )
+
+
+@router.post("/profile/requests")
+async def profile_requests(
+    sample_rate: float = Query(..., ge=0, le=1),
+    max_requests: int = Query(100, ge=1),
+    interval_ms: float = Query(5.0, ge=1, le=1000),
+):
+    """Starts stack sampling for a fraction of requests, discarding previous results"""
+    request_sampler.configure(sample_rate, max_requests, interval_ms / 1000)
+    return {"status": "ok", "sample_rate": sample_rate, "max_requests": max_requests}
+
+
+@router.get("/profile/requests")
+async def download_request_profile(
+    format: str = Query("collapsed", pattern="^(collapsed|pstats|text)$"),
+    sort: str = Query("cumulative"),
+    limit: int = Query(50, ge=1),
+):
+    """
+    Samples of the profiled requests as collapsed stacks or pstats. pstats call
+    counts are sample counts, and times are estimated from the sampling interval.
+    """
+    sort_keys = set(pstats.Stats.sort_arg_dict_default)
+    if sort not in sort_keys:
+        raise HTTPException(status_code=400, detail=f"sort must be one of {sorted(sort_keys)}")
+
+    profile = request_sampler.snapshot()
+    if profile is None:
+        raise HTTPException(status_code=404, detail="No requests have been profiled")
+
+    if format == "pstats":
+        return Response(
+            profile.dump(),
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": "attachment; filename=requests.pstats"}
+        )
+    if format == "text":
+        return PlainTextResponse(profile.render(sort, limit))
+    return PlainTextResponse(
+        profile.collapsed(),
+        headers={"Content-Disposition": "attachment; filename=requests.collapsed"}
+    )
+
+
+@router.post("/tracemalloc/start")
+async def tracemalloc_start(
+    frames: int = Query(1, ge=1, le=50),
+    stages: Optional[List[str]] = Query(None),
+):
+    """
+    Starts tracing allocations, discarding previous results.
+
+    Every measured stage takes two snapshots, costing time proportional to all
+    traced blocks, so pass `stages` to measure only the stages of interest.
+    Snapshots are process-wide: allocations of concurrent requests land in the
+    measured stage, and only one stage is measured at a time (others are skipped).
+    """
+    start_tracemalloc(frames, stages)
+    return {"status": "ok", "tracing": True, "stages": stages}
+
+
+@router.post("/tracemalloc/stop")
+async def tracemalloc_stop():
+    stop_tracemalloc()
+    return {"status": "ok", "tracing": False}
+
+
+@router.get("/tracemalloc")
+async def tracemalloc_report(limit: int = Query(TRACEMALLOC_TOP_N, ge=1, le=100)):
+    """Top allocation sites of each pipeline stage, summed over all measured runs"""
+    current, peak = tracemalloc.get_traced_memory()
+    return {
+        "tracing": tracemalloc.is_tracing(),
+        "traced_current_bytes": current,
+        "traced_peak_bytes": peak,
+        "stages": allocation_report(limit)
+    }
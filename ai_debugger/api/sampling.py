@@ -0,0 +1,235 @@
+import io
+import marshal
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+# (filename, first line, function name), the key pstats uses for a function
+FrameKey = Tuple[str, int, str]
+
+SAMPLER_THREAD_PREFIX = "stack-sampler"
+
+# Leaf frames of threads that are waiting rather than working
+IDLE_FRAMES = {
+    ("selectors.py", "select"),    # event loop waiting for I/O
+    ("threading.py", "wait"),      # Condition/Event waits, e.g. the anyio portal
+    ("thread.py", "_worker"),      # ThreadPoolExecutor worker waiting for work
+    ("queue.py", "get"),
+}
+
+def sample_stacks(include_idle: bool = False) -> List[Tuple[str, Tuple[FrameKey, ...]]]:
+    """Takes one wall-clock sample of every thread, as (thread name, root-to-leaf stack)"""
+    thread_names = {t.ident: t.name for t in threading.enumerate()}
+    own_thread = threading.get_ident()
+    samples = []
+
+    for thread_id, frame in sys._current_frames().items():
+        thread_name = thread_names.get(thread_id, str(thread_id))
+        if thread_id == own_thread or thread_name.startswith(SAMPLER_THREAD_PREFIX):
+            continue
+
+        leaf = frame.f_code
+        if not include_idle and (os.path.basename(leaf.co_filename), leaf.co_name) in IDLE_FRAMES:
+            continue
+
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+            frame = frame.f_back
+        stack.reverse()
+        samples.append((thread_name, tuple(stack)))
+
+    return samples
+
+class _LoadedStats:
+    """Adapter that lets pstats.Stats load a ready-made stats dict"""
+
+    def __init__(self, stats: Dict):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+class StackProfile:
+    """Aggregated stack samples, exportable as collapsed stacks or pstats"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self.ticks = 0
+        self.sampled_seconds = 0.0
+
+    def add(self, samples: List[Tuple[str, Tuple[FrameKey, ...]]], period: float):
+        """Adds one tick of samples, `period` being the measured time since the previous tick"""
+        self.samples.update(samples)
+        self.ticks += 1
+        self.sampled_seconds += period
+
+    @property
+    def seconds_per_sample(self) -> float:
+        # Ticks run slower than the requested interval, so use the measured period
+        return self.sampled_seconds / self.ticks if self.ticks else self.interval
+
+    def collapsed(self) -> str:
+        lines = []
+        for (thread_name, stack), count in self.samples.most_common():
+            frames = ";".join(f"{name} ({os.path.basename(filename)}:{line})" for filename, line, name in stack)
+            lines.append(f"{thread_name};{frames} {count}\n")
+        return "".join(lines)
+
+    def stats(self) -> Dict:
+        """
+        Builds a pstats-compatible dict. Call counts are sample counts and
+        times are sample counts multiplied by the measured sampling period.
+        """
+        entries: Dict[FrameKey, List] = {}
+        seconds_per_sample = self.seconds_per_sample
+        for (_, stack), count in self.samples.items():
+            elapsed = count * seconds_per_sample
+            seen = set()
+            for depth, func in enumerate(stack):
+                entry = entries.setdefault(func, [0, 0, 0.0, 0.0, {}])
+                is_leaf = depth == len(stack) - 1
+                if func not in seen:
+                    # Recursive frames count once towards inclusive time
+                    seen.add(func)
+                    entry[0] += count
+                    entry[1] += count
+                    entry[3] += elapsed
+                if is_leaf:
+                    entry[2] += elapsed
+                if depth > 0:
+                    caller = entry[4].setdefault(stack[depth - 1], [0, 0, 0.0, 0.0])
+                    caller[0] += count
+                    caller[1] += count
+                    caller[2] += elapsed if is_leaf else 0.0
+                    caller[3] += elapsed
+
+        return {
+            func: (cc, nc, tt, ct, {caller: tuple(values) for caller, values in callers.items()})
+            for func, (cc, nc, tt, ct, callers) in entries.items()
+        }
+
+    def dump(self) -> bytes:
+        """Serializes like pstats.Stats.dump_stats, loadable with pstats.Stats(path)"""
+        return marshal.dumps(self.stats())
+
+    def render(self, sort: str, limit: int) -> str:
+        out = io.StringIO()
+        pstats.Stats(_LoadedStats(self.stats()), stream=out).sort_stats(sort).print_stats(limit)
+        return out.getvalue()
+
+# -------------------------
+# Duration Sampling
+# -------------------------
+class StackSampler:
+    """Samples the wall-clock stacks of all threads for a fixed duration"""
+
+    def __init__(self):
+        self._running = threading.Lock()
+
+    def run(self, duration: float, interval: float, include_idle: bool = False) -> Optional[StackProfile]:
+        if not self._running.acquire(blocking=False):
+            return None
+        try:
+            profile = StackProfile(interval)
+            deadline = time.monotonic() + duration
+            last_tick = time.monotonic()
+            while last_tick < deadline:
+                samples = sample_stacks(include_idle)
+                now = time.monotonic()
+                profile.add(samples, now - last_tick)
+                last_tick = now
+                time.sleep(interval)
+            return profile
+        finally:
+            self._running.release()
+
+stack_sampler = StackSampler()
+
+# -------------------------
+# Request Sampling
+# -------------------------
+class RequestSampler:
+    """
+    Samples stacks while a random fraction of requests is in flight.
+
+    Stacks come from all busy threads, so batch workers are included, and so
+    is any other request that runs at the same time as a sampled one.
+    """
+
+    def __init__(self):
+        self.sample_rate = 0.0
+        self.max_requests = 0
+        self.profiled_requests = 0
+        self.interval = 0.005
+        self._profile: Optional[StackProfile] = None
+        self._in_flight = 0
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def configure(self, sample_rate: float, max_requests: int, interval: float):
+        with self._lock:
+            self.sample_rate = sample_rate
+            self.max_requests = max_requests
+            self.interval = interval
+            self.profiled_requests = 0
+            self._profile = StackProfile(interval)
+
+    def should_sample(self) -> bool:
+        with self._lock:
+            if self.sample_rate <= 0 or self.profiled_requests + self._in_flight >= self.max_requests:
+                return False
+            return random.random() < self.sample_rate
+
+    @contextmanager
+    def profile(self):
+        with self._lock:
+            self._in_flight += 1
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name=f"{SAMPLER_THREAD_PREFIX}-requests", daemon=True
+                )
+                self._thread.start()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+                self.profiled_requests += 1
+
+    def _run(self):
+        last_tick = time.monotonic()
+        while True:
+            with self._lock:
+                if self._in_flight == 0:
+                    self._thread = None
+                    return
+                interval = self.interval
+            samples = sample_stacks()
+            now = time.monotonic()
+            with self._lock:
+                if self._profile is not None:
+                    self._profile.add(samples, now - last_tick)
+            last_tick = now
+            time.sleep(interval)
+
+    def snapshot(self) -> Optional[StackProfile]:
+        """Copy of the samples collected so far, or None if nothing was sampled"""
+        with self._lock:
+            if self._profile is None or not self._profile.samples:
+                return None
+            profile = StackProfile(self._profile.interval)
+            profile.samples = self._profile.samples.copy()
+            profile.ticks = self._profile.ticks
+            profile.sampled_seconds = self._profile.sampled_seconds
+            return profile
+
+request_sampler = RequestSampler()
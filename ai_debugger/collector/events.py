@@ -3,6 +3,8 @@ from kubernetes import client, config
 from typing import Dict, List, Optional
 import os
 
+from ai_debugger.profiling import stage
+
 class KubernetesEventCollector:
     def __init__(self, namespace: str):
         self.namespace = namespace
@@ -32,7 +34,9 @@ class KubernetesEventCollector:
     def collect_pod_events(self, window_minutes: int = 10) -> Dict:
         """Collect pod events within time window"""
         try:
-            events = self.core_v1.list_namespaced_event(self.namespace)
+            # Includes the API round trip and deserializing the event list
+            with stage("list_namespaced_event"):
+                events = self.core_v1.list_namespaced_event(self.namespace)
         except client.exceptions.ApiException as e:
             return {
                 "namespace": self.namespace,
@@ -55,32 +59,33 @@ class KubernetesEventCollector:
         
         pod_events = []
         
-        for event in events.items:
-            if not event.involved_object or event.involved_object.kind != "Pod":
-                continue
-            
-            if event.reason not in relevant_reasons:
-                continue
-            
-            # Get the correct timestamp
-            event_time = (
-                event.event_time or
-                event.last_timestamp or
-                event.first_timestamp or
-                event.metadata.creation_timestamp
-            )
-            
-            if not event_time or not self._within_time_window(event_time, window_minutes):
-                continue
-            
-            pod_events.append({
-                "pod": event.involved_object.name,
-                "reason": event.reason,
-                "message": event.message,
-                "count": event.count or 1,
-                "last_seen": event_time.isoformat() if hasattr(event_time, 'isoformat') else str(event_time),
-                "type": event.type
-            })
+        with stage("filter_pod_events"):
+            for event in events.items:
+                if not event.involved_object or event.involved_object.kind != "Pod":
+                    continue
+                
+                if event.reason not in relevant_reasons:
+                    continue
+                
+                # Get the correct timestamp
+                event_time = (
+                    event.event_time or
+                    event.last_timestamp or
+                    event.first_timestamp or
+                    event.metadata.creation_timestamp
+                )
+                
+                if not event_time or not self._within_time_window(event_time, window_minutes):
+                    continue
+                
+                pod_events.append({
+                    "pod": event.involved_object.name,
+                    "reason": event.reason,
+                    "message": event.message,
+                    "count": event.count or 1,
+                    "last_seen": event_time.isoformat() if hasattr(event_time, 'isoformat') else str(event_time),
+                    "type": event.type
+                })
         
         return {
             "namespace": self.namespace,
@@ -91,25 +96,28 @@ class KubernetesEventCollector:
     def collect_pod_restarts(self) -> List[Dict]:
         """Collect pod restart counts"""
         try:
-            pods = self.core_v1.list_namespaced_pod(self.namespace)
+            # Includes the API round trip and deserializing the pod list
+            with stage("list_namespaced_pod"):
+                pods = self.core_v1.list_namespaced_pod(self.namespace)
         except client.exceptions.ApiException:
             return []
         
         restart_summary = []
         
-        for pod in pods.items:
-            total_restarts = 0
-            
-            if pod.status.container_statuses:
-                for cs in pod.status.container_statuses:
-                    total_restarts += cs.restart_count
-            
-            if total_restarts > 0:
-                restart_summary.append({
-                    "pod": pod.metadata.name,
-                    "restart_count": total_restarts,
-                    "status": pod.status.phase
-                })
+        with stage("summarize_pod_restarts"):
+            for pod in pods.items:
+                total_restarts = 0
+                
+                if pod.status.container_statuses:
+                    for cs in pod.status.container_statuses:
+                        total_restarts += cs.restart_count
+                
+                if total_restarts > 0:
+                    restart_summary.append({
+                        "pod": pod.metadata.name,
+                        "restart_count": total_restarts,
+                        "status": pod.status.phase
+                    })
         
         return restart_summary
     
@@ -0,0 +1,111 @@
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Set
+
+# Per-request stage timings, only populated when requested
+_request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_timings", default=None)
+# Batch workers share the timings dict of their request
+_request_timings_lock = threading.Lock()
+
+TRACEMALLOC_TOP_N = 10
+# Allocation sites kept per stage run before merging, bounds the cost of a run
+TRACEMALLOC_SITES_PER_RUN = 50
+
+# Stages measured by tracemalloc, None means all stages
+_traced_stages: Optional[Set[str]] = None
+# stage -> {"runs": int, "sites": {location: {"size_diff_bytes", "count_diff"}}}
+_stage_allocations: Dict[str, Dict] = {}
+_stage_allocations_lock = threading.Lock()
+# Snapshots are process-wide, so only one stage is measured at a time
+_snapshot_lock = threading.Lock()
+
+# -------------------------
+# Stage Timings
+# -------------------------
+@contextmanager
+def request_timings(enabled: bool):
+    """Collects stage timings for the duration of a request, yields None when disabled"""
+    timings = {} if enabled else None
+    token = _request_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _request_timings.reset(token)
+
+def current_timings() -> Optional[Dict[str, float]]:
+    """Returns the stage timings of the current request, or None if not requested"""
+    return _request_timings.get()
+
+@contextmanager
+def stage(name: str):
+    """
+    Times a pipeline stage for the current request and, while tracemalloc is
+    tracing, records the allocation sites of the stage.
+    """
+    timings = _request_timings.get()
+    measure = (
+        tracemalloc.is_tracing()
+        and (_traced_stages is None or name in _traced_stages)
+        and _snapshot_lock.acquire(blocking=False)
+    )
+    try:
+        before = tracemalloc.take_snapshot() if measure else None
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if timings is not None:
+                with _request_timings_lock:
+                    timings[name] = round(timings.get(name, 0.0) + elapsed_ms, 3)
+            if before is not None and tracemalloc.is_tracing():
+                _record_allocations(name, before, tracemalloc.take_snapshot())
+    finally:
+        if measure:
+            _snapshot_lock.release()
+
+# -------------------------
+# Stage Allocations
+# -------------------------
+def start_tracemalloc(frames: int, stages: Optional[List[str]] = None):
+    """Starts tracing allocations of `stages` (all stages if None), discarding previous results"""
+    global _traced_stages
+    _traced_stages = set(stages) if stages else None
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+    with _stage_allocations_lock:
+        _stage_allocations.clear()
+
+def stop_tracemalloc():
+    tracemalloc.stop()
+
+def allocation_report(limit: int = TRACEMALLOC_TOP_N) -> Dict[str, Dict]:
+    """Top allocation sites of each stage, summed over all measured runs"""
+    with _stage_allocations_lock:
+        report = {}
+        for name, entry in _stage_allocations.items():
+            sites = sorted(entry["sites"].items(), key=lambda item: item[1]["size_diff_bytes"], reverse=True)
+            report[name] = {
+                "runs": entry["runs"],
+                "top": [{"location": location, **totals} for location, totals in sites[:limit]]
+            }
+        return report
+
+def _record_allocations(name: str, before: tracemalloc.Snapshot, after: tracemalloc.Snapshot):
+    filters = [
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+    ]
+    diff = after.filter_traces(filters).compare_to(before.filter_traces(filters), "lineno")
+    with _stage_allocations_lock:
+        entry = _stage_allocations.setdefault(name, {"runs": 0, "sites": {}})
+        entry["runs"] += 1
+        for stat in diff[:TRACEMALLOC_SITES_PER_RUN]:
+            if stat.size_diff <= 0:
+                continue
+            site = entry["sites"].setdefault(str(stat.traceback), {"size_diff_bytes": 0, "count_diff": 0})
+            site["size_diff_bytes"] += stat.size_diff
+            site["count_diff"] += stat.count_diff
@@ -1,33 +1,55 @@
 import os
 import json
 import time
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 
 class LLMResponseError(Exception):
     pass
 
 class BaseLLMClient:
+    # Whether several RCA tasks can be packed into a single call
+    supports_batching = False
+    
     def analyze(self, prompt: str) -> Dict[str, Any]:
         raise NotImplementedError
+    
+    def analyze_batch(self, prompt: str, task_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Returns the raw RCA response of each task, keyed by task ID"""
+        raise NotImplementedError
 
 class MockLLMClient(BaseLLMClient):
+    supports_batching = True
+    
     def __init__(self, mode: str = "good"):
         self.mode = mode
     
-    def analyze(self, prompt: str) -> Dict[str, Any]:
+    def _response(self) -> Dict[str, Any]:
         if self.mode == "bad":
             return {"invalid": "response"}
         
-        # Simulate processing time
-        time.sleep(0.5)
-        
         return {
             "root_cause": "Container OOMKilled due to memory limit exhaustion",
             "supporting_evidence_ids": ["E1", "E2"],
             "confidence": 0.85
         }
+    
+    def analyze(self, prompt: str) -> Dict[str, Any]:
+        if self.mode != "bad":
+            # Simulate processing time
+            time.sleep(0.5)
+        
+        return self._response()
+    
+    def analyze_batch(self, prompt: str, task_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        if self.mode != "bad":
+            # Simulate processing time of a single call
+            time.sleep(0.5)
+        
+        return {task_id: self._response() for task_id in task_ids}
 
 class OpenAILLMClient(BaseLLMClient):
+    supports_batching = True
+    
     def __init__(self):
         api_key = os.getenv("OPENAI_API_KEY")
         if not api_key:
@@ -39,6 +61,23 @@ class OpenAILLMClient(BaseLLMClient):
         self.timeout = float(os.getenv("LLM_TIMEOUT", "10"))
     
     def analyze(self, prompt: str) -> Dict[str, Any]:
+        return self._complete(prompt, max_tokens=300, timeout=self.timeout)
+    
+    def analyze_batch(self, prompt: str, task_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        # A packed call produces one answer per task, so it gets the budget of each
+        parsed = self._complete(
+            prompt,
+            max_tokens=300 * len(task_ids),
+            timeout=self.timeout * len(task_ids)
+        )
+        
+        results = parsed.get("results") if isinstance(parsed, dict) else None
+        if not isinstance(results, dict):
+            raise LLMResponseError("LLM batch response missing results")
+        
+        return results
+    
+    def _complete(self, prompt: str, max_tokens: int, timeout: float) -> Dict[str, Any]:
         start = time.time()
         
         try:
@@ -52,8 +91,8 @@ class OpenAILLMClient(BaseLLMClient):
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.2,
-                max_tokens=300,
-                timeout=self.timeout
+                max_tokens=max_tokens,
+                timeout=timeout
             )
             
             content = response.choices[0].message.content
@@ -66,7 +105,7 @@ class OpenAILLMClient(BaseLLMClient):
             
             parsed = json.loads(content.strip())
             
-            if time.time() - start > self.timeout:
+            if time.time() - start > timeout:
                 raise LLMResponseError("LLM response timeout")
             
             return parsed
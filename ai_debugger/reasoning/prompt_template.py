@@ -28,3 +28,44 @@ RESPONSE FORMAT (JSON ONLY):
 
 DO NOT include explanations or markdown.
 """
+
+def build_batch_prompt(tasks: Dict[str, List[Dict]]) -> str:
+    """
+    Packs several independent RCA tasks into one prompt.
+    Evidence IDs are scoped to their task.
+    """
+    task_blocks = "\n\n".join(
+        f"TASK {task_id} EVIDENCE:\n{json.dumps(ranked_signals, indent=2)}"
+        for task_id, ranked_signals in tasks.items()
+    )
+    example_id = next(iter(tasks))
+    
+    return f"""You are an AI assistant performing production incident root cause analysis.
+You are given {len(tasks)} independent incidents. Analyze each one separately.
+
+RULES:
+- Use ONLY the evidence provided for that task
+- Do NOT use evidence from one task in another
+- Do NOT assume missing information
+- Do NOT speculate
+- If evidence is insufficient, set root_cause to "insufficient_evidence"
+- You MUST reference evidence using evidence IDs only
+
+{task_blocks}
+
+TASK:
+For every task, determine the most likely root cause based ONLY on its evidence.
+
+RESPONSE FORMAT (JSON ONLY, one entry per task ID):
+{{
+  "results": {{
+    "{example_id}": {{
+      "root_cause": "short factual statement or 'insufficient_evidence'",
+      "supporting_evidence_ids": ["E1", "E2"],
+      "confidence": 0.85
+    }}
+  }}
+}}
+
+DO NOT include explanations or markdown.
+"""
@@ -0,0 +1,116 @@
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from ai_debugger.api import main
+from ai_debugger.reasoning.llm_client import MockLLMClient
+from ai_debugger.tests.test_signals import synthetic_signals
+
+class CountingLLMClient(MockLLMClient):
+    """Mock client without the simulated delay that records every call"""
+
+    def __init__(self, fail_packed: bool = False, drop_tasks: int = 0):
+        super().__init__(mode="good")
+        self.fail_packed = fail_packed
+        self.drop_tasks = drop_tasks
+        self.single_calls = []
+        self.packed_calls = []
+
+    def analyze(self, prompt):
+        self.single_calls.append(prompt)
+        return self._response()
+
+    def analyze_batch(self, prompt, task_ids):
+        self.packed_calls.append(task_ids)
+        if self.fail_packed:
+            raise RuntimeError("provider unavailable")
+        # Models sometimes leave tasks out of a packed answer
+        return {task_id: self._response() for task_id in task_ids[self.drop_tasks:]}
+
+def signal_set(pod: str, size: int = 2):
+    signals = synthetic_signals()[:size]
+    for s in signals:
+        s["value"] = pod
+    return signals
+
+def llm_calls(kind: str) -> float:
+    return REGISTRY.get_sample_value("ai_debugger_batch_llm_calls_total", {"kind": kind}) or 0.0
+
+@pytest.fixture
+def client():
+    return TestClient(main.app)
+
+@pytest.fixture
+def llm(monkeypatch):
+    llm = CountingLLMClient()
+    monkeypatch.setattr(main, "get_llm_client", lambda mode: llm)
+    return llm
+
+def test_identical_evidence_sets_are_analyzed_once(client, llm):
+    api = signal_set("api")
+    items = [
+        {"id": "a", "signals": api},
+        {"id": "b", "signals": signal_set("web")},
+        {"id": "c", "signals": api},
+    ]
+
+    body = client.post("/analyze/batch", json={"items": items, "llm_mode": "good"}).json()
+
+    assert body["unique_evidence_sets"] == 2
+    assert [r["id"] for r in body["results"]] == ["a", "b", "c"]
+    assert all(r["status"] == "success" for r in body["results"])
+    assert body["results"][0]["rca"] == body["results"][2]["rca"]
+    assert sum(len(ids) for ids in llm.packed_calls) == 2
+
+def test_small_tasks_are_packed_and_large_tasks_run_singly(client, llm, monkeypatch):
+    monkeypatch.setattr(main, "LLM_BATCH_MAX_SIGNALS", 2)
+    monkeypatch.setattr(main, "LLM_BATCH_MAX_TASKS", 2)
+    items = [{"signals": signal_set(f"pod-{i}")} for i in range(3)]
+    items.append({"signals": signal_set("large", size=3)})
+
+    body = client.post("/analyze/batch", json={"items": items, "llm_mode": "good"}).json()
+
+    assert body["items_failed"] == 0
+    assert sorted(len(ids) for ids in llm.packed_calls) == [1, 2]
+    assert len(llm.single_calls) == 1
+
+def test_failed_packed_call_falls_back_to_single_calls(client, monkeypatch):
+    llm = CountingLLMClient(fail_packed=True)
+    monkeypatch.setattr(main, "get_llm_client", lambda mode: llm)
+    items = [{"signals": signal_set("api")}, {"signals": signal_set("web")}]
+    packed_before = llm_calls("packed")
+
+    response = client.post("/analyze/batch", json={"items": items, "llm_mode": "good"})
+
+    assert response.status_code == 200
+    assert response.json()["items_failed"] == 0
+    assert len(llm.packed_calls) == 1
+    assert len(llm.single_calls) == 2
+    assert llm_calls("packed") == packed_before + 1
+
+def test_tasks_missing_from_packed_response_are_retried(client, monkeypatch):
+    llm = CountingLLMClient(drop_tasks=1)
+    monkeypatch.setattr(main, "get_llm_client", lambda mode: llm)
+    items = [{"signals": signal_set(f"pod-{i}")} for i in range(3)]
+
+    body = client.post("/analyze/batch", json={"items": items, "llm_mode": "good"}).json()
+
+    assert body["items_failed"] == 0
+    assert len(llm.packed_calls) == 1
+    assert len(llm.single_calls) == 1
+
+def test_item_errors_do_not_fail_the_batch(client, llm):
+    items = [
+        {"id": "ok", "signals": signal_set("api")},
+        {"id": "missing-value", "signals": [{"name": "OOMKilled"}]},
+        {"id": "bad-severity", "signals": [
+            {"name": "cpu", "value": 1, "severity": "high"},
+            {"name": "mem", "value": 2, "severity": 3},
+        ]},
+    ]
+
+    response = client.post("/analyze/batch", json={"items": items, "llm_mode": "good"})
+
+    assert response.status_code == 200
+    statuses = {r["id"]: r["status"] for r in response.json()["results"]}
+    assert statuses == {"ok": "success", "missing-value": "error", "bad-severity": "error"}
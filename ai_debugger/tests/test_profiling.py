@@ -0,0 +1,94 @@
+import pstats
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from ai_debugger.api import main
+from ai_debugger.api.sampling import request_sampler
+from ai_debugger.profiling import stop_tracemalloc
+from ai_debugger.reasoning.llm_client import MockLLMClient
+from ai_debugger.tests.test_signals import synthetic_signals
+
+ADMIN = {"X-Admin-Token": "s3cret"}
+
+class SlowLLMClient(MockLLMClient):
+    """Mock client that stays busy long enough to be sampled"""
+
+    def analyze(self, prompt):
+        deadline = time.perf_counter() + 0.05
+        while time.perf_counter() < deadline:
+            pass
+        return self._response()
+
+@pytest.fixture
+def client():
+    return TestClient(main.app)
+
+@pytest.fixture
+def admin(monkeypatch):
+    monkeypatch.setenv("ADMIN_TOKEN", "s3cret")
+
+@pytest.fixture
+def sampler():
+    yield request_sampler
+    request_sampler.configure(0.0, 0, request_sampler.interval)
+
+def analyze(client, headers=None, llm_mode="disabled"):
+    return client.post("/analyze", json={"signals": synthetic_signals(), "llm_mode": llm_mode}, headers=headers)
+
+def test_debug_endpoints_are_hidden_without_admin_token(client, monkeypatch):
+    monkeypatch.delenv("ADMIN_TOKEN", raising=False)
+
+    assert client.get("/debug/tracemalloc", headers=ADMIN).status_code == 404
+
+def test_debug_endpoints_reject_wrong_admin_token(client, admin):
+    assert client.get("/debug/tracemalloc", headers={"X-Admin-Token": "wrong"}).status_code == 403
+    assert client.get("/debug/tracemalloc").status_code == 403
+
+def test_debug_timing_header_adds_timings(client):
+    response = analyze(client, headers={"X-Debug-Timing": "1"})
+
+    assert "rank_signals" in response.json()["timings"]
+    assert "rank_signals;dur=" in response.headers["Server-Timing"]
+
+def test_debug_timing_header_off_values_add_nothing(client):
+    response = analyze(client, headers={"X-Debug-Timing": "0"})
+
+    assert "timings" not in response.json()
+    assert "Server-Timing" not in response.headers
+
+def test_sampled_requests_download_as_pstats(client, admin, sampler, monkeypatch, tmp_path):
+    monkeypatch.setattr(main, "get_llm_client", lambda mode: SlowLLMClient())
+    client.post("/debug/profile/requests?sample_rate=1&max_requests=2&interval_ms=1", headers=ADMIN)
+
+    for _ in range(3):
+        analyze(client, llm_mode="good")
+
+    assert sampler.profiled_requests == 2
+
+    response = client.get("/debug/profile/requests?format=pstats", headers=ADMIN)
+    assert response.status_code == 200
+    path = tmp_path / "requests.pstats"
+    path.write_bytes(response.content)
+    functions = {name for _, _, name in pstats.Stats(str(path)).stats}
+    assert "analyze" in functions
+
+    collapsed = client.get("/debug/profile/requests", headers=ADMIN).text
+    assert "analyze (test_profiling.py" in collapsed
+
+def test_unknown_sort_key_is_rejected(client, admin):
+    response = client.get("/debug/profile/requests?format=text&sort=bogus", headers=ADMIN)
+
+    assert response.status_code == 400
+
+def test_tracemalloc_records_only_selected_stages(client, admin):
+    client.post("/debug/tracemalloc/start?stages=rank_signals", headers=ADMIN)
+    try:
+        analyze(client)
+        stages = client.get("/debug/tracemalloc", headers=ADMIN).json()["stages"]
+    finally:
+        stop_tracemalloc()
+
+    assert set(stages) == {"rank_signals"}
+    assert stages["rank_signals"]["runs"] == 1
@@ -0,0 +1,46 @@
+import json
+
+import pytest
+
+from ai_debugger.reasoning.llm_client import LLMResponseError, OpenAILLMClient
+from ai_debugger.reasoning.prompt_template import build_batch_prompt
+
+def openai_client(monkeypatch, parsed):
+    """OpenAI client whose completion returns `parsed` and records its arguments"""
+    llm = OpenAILLMClient.__new__(OpenAILLMClient)
+    llm.timeout = 10.0
+    llm.calls = []
+
+    def complete(prompt, max_tokens, timeout):
+        llm.calls.append({"max_tokens": max_tokens, "timeout": timeout})
+        return parsed
+
+    monkeypatch.setattr(llm, "_complete", complete)
+    return llm
+
+@pytest.mark.parametrize("parsed", [{}, {"results": ["T1"]}, ["T1"]])
+def test_analyze_batch_rejects_response_without_results(monkeypatch, parsed):
+    llm = openai_client(monkeypatch, parsed)
+
+    with pytest.raises(LLMResponseError):
+        llm.analyze_batch("prompt", ["T1"])
+
+def test_analyze_batch_scales_budget_with_task_count(monkeypatch):
+    results = {"T1": {}, "T2": {}, "T3": {}}
+    llm = openai_client(monkeypatch, {"results": results})
+
+    assert llm.analyze_batch("prompt", ["T1", "T2", "T3"]) == results
+    assert llm.calls == [{"max_tokens": 900, "timeout": 30.0}]
+
+def test_build_batch_prompt_lists_every_task():
+    tasks = {
+        "T1": [{"id": "E1", "name": "OOMKilled", "value": "api"}],
+        "T2": [{"id": "E1", "name": "BackOff", "value": "web"}],
+    }
+
+    prompt = build_batch_prompt(tasks)
+
+    assert "2 independent incidents" in prompt
+    for task_id, evidence in tasks.items():
+        assert f"TASK {task_id} EVIDENCE:\n{json.dumps(evidence, indent=2)}" in prompt
+    assert '"results"' in prompt